@@ -6,9 +6,15 @@ from the original deep_research_clone.py file with clean UI.
 """
 
 import streamlit as st
-from openai import OpenAI
-import json
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+import openai
+import httpx
+import asyncio
+import orjson
 import os
+import re
+import threading
+import time
 import itertools
 from dotenv import load_dotenv
 
@@ -20,12 +26,27 @@ MODEL = "gpt-4o"
 MODEL_MINI = "gpt-4o-mini"
 TOOLS = [{'type': 'web_search'}]
 
+# Maximum number of web searches in flight at once (rate limit safety)
+MAX_CONCURRENT_SEARCHES = 10
+# Maximum number of web search results kept in the shared cache
+MAX_CACHED_SEARCHES = 1000
+# Numbered clarifying question line, e.g. "1. ..." or "2) ..."
+QUESTION_RE = re.compile(r"^\s*\d+[.)]\s*(.+?)\s*$", re.M)
+# Connection pool limits for the OpenAI HTTP clients
+HTTP_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+
 # Developer message definition (matching original exactly)
 DEVELOPER_MESSAGE = """
 You are an expert Deep Researcher.
 You provide complete and in depth research to the user.
 """
 
+@st.cache_resource(show_spinner=False)
+def create_openai_client(api_key):
+    """Create a long-lived OpenAI client (one per API key, reused across reruns)"""
+    return OpenAI(api_key=api_key,
+                  http_client=DefaultHttpxClient(http2=True, limits=HTTP_LIMITS))
+
 def get_openai_client():
     """Get OpenAI client with API key validation"""
     # Try to get API key from environment first
@@ -58,7 +79,7 @@ def get_openai_client():
         st.stop()
     
     try:
-        client = OpenAI(api_key=api_key)
+        client = create_openai_client(api_key)
         # Store the API key in session state for persistence
         st.session_state['api_key'] = api_key
         return client
@@ -66,12 +87,32 @@ def get_openai_client():
         st.error(f"❌ Error connecting to OpenAI: {str(e)}")
         st.stop()
 
+def get_async_openai_client():
+    """Get async OpenAI client using the API key from session state
+
+    Not cached: its connection pool is bound to the event loop that
+    asyncio.run creates, so use run_with_async_client to get one per loop.
+    """
+    return AsyncOpenAI(api_key=st.session_state['api_key'],
+                       http_client=DefaultAsyncHttpxClient(http2=True, limits=HTTP_LIMITS))
+
+def run_with_async_client(coro_fn, *args):
+    """Run coro_fn(async_client, *args) on a new event loop, closing the client before it ends"""
+    async def runner():
+        async with get_async_openai_client() as client:
+            return await coro_fn(client, *args)
+    return asyncio.run(runner())
+
 # --- Step 1: Get topic ---
 def get_topic():
     """Get research topic from user"""
     return st.text_input('🔬 Research topic:', key='topic').strip()
 
+# Cached API calls are keyed on the client's API key rather than the client object
+CLIENT_HASH_FUNCS = {OpenAI: lambda client: client.api_key}
+
 # --- Step 2: Clarifying questions ---
+@st.cache_data(ttl=3600, show_spinner=False, hash_funcs=CLIENT_HASH_FUNCS)
 def get_clarifying_questions(client, topic):
     """Generate 5 clarifying questions (matching original exactly)"""
     # Define prompt to clarify (matching original exactly)
@@ -83,30 +124,47 @@ Reply only with the questions
     
     clarify = client.responses.create(
         model=MODEL_MINI,
-        input=prompt_to_clarify,
+        input=[{"role": "user", "content": prompt_to_clarify}],
         instructions=DEVELOPER_MESSAGE,
     )
     
-    # Get the questions (matching original exactly)
-    questions = clarify.output[0].content[0].text.split("\n")
-    # Filter out empty questions
-    questions = [q.strip() for q in questions if q.strip()]
+    # Extract the numbered questions in one pass
+    text = clarify.output[0].content[0].text
+    questions = QUESTION_RE.findall(text)
+    if not questions:
+        # Fall back to one question per non-empty line if the model skipped numbering
+        questions = [q.strip() for q in text.split("\n") if q.strip()]
     
-    return questions, clarify.id
+    # Conversation so far, replayed explicitly by later steps
+    history = [{"role": "user", "content": prompt_to_clarify},
+               {"role": "assistant", "content": text}]
+    return questions, history
 
 # --- Step 3: Collect answers ---
 def get_answers(questions):
-    """Collect answers to clarifying questions"""
-    answers = []
+    """Collect answers to clarifying questions
+
+    Answers are batched in a form so typing does not rerun the app.
+    Returns None until answers to these questions have been submitted.
+    """
     st.subheader("📝 Please answer these clarifying questions:")
     
-    for i, question in enumerate(questions):
-        answer = st.text_input(question, key=f'answer_{i}')
-        answers.append(answer)
-    return answers
+    with st.form("clarify_form"):
+        answers = []
+        for i, question in enumerate(questions):
+            answer = st.text_input(question, key=f'answer_{i}')
+            answers.append(answer)
+        submitted = st.form_submit_button("Submit answers")
+    
+    # Keep submitted answers across reruns, tied to the questions they answer
+    if submitted:
+        st.session_state['submitted_answers'] = (questions, answers)
+    submitted_questions, submitted_answers = st.session_state.get('submitted_answers', (None, None))
+    return submitted_answers if submitted_questions == questions else None
 
 # --- Step 4: Generate goal and queries ---
-def get_goal_and_queries(client, topic, questions, answers, clarify_id):
+@st.cache_data(ttl=3600, show_spinner=False, hash_funcs=CLIENT_HASH_FUNCS)
+def get_goal_and_queries(client, topic, questions, answers, clarify_history):
     """Generate research goal and search queries (matching original exactly)"""
     # Write the prompt_goals prompt (matching original exactly)
     prompt_goals = f"""
@@ -115,134 +173,296 @@ Output: A JSON list of the goal and the 5 web search quesries that will reach it
 Format: {{"goal": "...", "queries": ["q1", ....]}}
 """
     
-    # Use the responses API (matching original exactly)
+    # Pass the clarifying conversation explicitly so its stable prefix can hit the prompt cache
     goal_and_queries = client.responses.create(
         model=MODEL,
-        input=prompt_goals,
-        previous_response_id=clarify_id,
+        input=clarify_history + [{"role": "user", "content": prompt_goals}],
         instructions=DEVELOPER_MESSAGE,
     )
     
     # Formatting and loading as JSON (matching original exactly)
-    plan = json.loads(goal_and_queries.output[0].content[0].text)
-    return plan, goal_and_queries.id
+    text = goal_and_queries.output[0].content[0].text
+    plan = orjson.loads(text)
+    history = clarify_history + [{"role": "user", "content": prompt_goals},
+                                 {"role": "assistant", "content": text}]
+    return plan, history
+
+def is_query_list(value):
+    """Check that a parsed model reply is a list of search query strings"""
+    return isinstance(value, list) and all(isinstance(q, str) for q in value)
 
 # --- Step 5: Run web search ---
-def run_search(client, q):
+@st.cache_resource(ttl=86400, show_spinner=False)
+def get_search_cache():
+    """Shared web search results keyed by query (cleared daily)"""
+    return {}
+
+# Guards the shared search cache, which every session thread reads and writes
+SEARCH_CACHE_LOCK = threading.Lock()
+
+async def run_search_async(client, q, semaphore):
     """Run a single web search query (matching original exactly)"""
-    web_search = client.responses.create(
-        model=MODEL,
-        input=f"Search: {q}",
-        # previous_response_id=goal_and_queries.id,  # Commented out like original
-        instructions=DEVELOPER_MESSAGE,
-        tools=TOOLS
-    )
+    async with semaphore:
+        web_search = await client.responses.create(
+            model=MODEL,
+            input=f"Search: {q}",
+            # previous_response_id=goal_and_queries.id,  # Commented out like original
+            instructions=DEVELOPER_MESSAGE,
+            tools=TOOLS
+        )
     return {'query': q,
             'resp_id': web_search.output[1].id,
             'research_output': web_search.output[1].content[0].text}
 
+async def run_searches_async(client, queries, progress_bar=None):
+    """Run all web search queries concurrently, preserving query order"""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SEARCHES)
+    cache = get_search_cache()
+    done = 0
+
+    async def search(q):
+        nonlocal done
+        with SEARCH_CACHE_LOCK:
+            result = cache.get(q)
+        if result is None:
+            # The network call stays outside the lock
+            result = await run_search_async(client, q, semaphore)
+            with SEARCH_CACHE_LOCK:
+                if len(cache) >= MAX_CACHED_SEARCHES:
+                    # Evict the oldest entry (dicts keep insertion order)
+                    cache.pop(next(iter(cache)), None)
+                cache[q] = result
+        done += 1
+        if progress_bar is not None:
+            progress_bar.progress(done / len(queries))
+        return result
+
+    return await asyncio.gather(*[search(q) for q in queries])
+
 # --- Step 6: Evaluate if goal is met ---
-def evaluate(client, goal, collected):
-    """Evaluate if collected data satisfies the research goal (matching original exactly)"""
-    review = client.responses.create(
-        model=MODEL,
+# Characters of each search output kept when condensing collected results
+CONDENSED_SNIPPET_CHARS = 400
+
+def condensed_json(result):
+    """Serialize a search result as query + snippet to keep prompts short"""
+    return orjson.dumps({"q": result["query"],
+                         "snippet": result["research_output"][:CONDENSED_SNIPPET_CHARS]}).decode()
+
+def join_json(item_jsons):
+    """Join already-serialized JSON items into a JSON array"""
+    return "[" + ",".join(item_jsons) + "]"
+
+def evaluate_request(goal, collected_json):
+    """Build the evaluation request (sends condensed results, not full outputs)"""
+    return dict(
+        model=MODEL_MINI,
         input=[
             {"role": "developer", "content": f"Research goal: {goal}"},
-            {"role": "assistant", "content": json.dumps(collected)},
+            {"role": "assistant", "content": collected_json},
             {"role": "user", "content": "Does this information will fully satisfy the goal? Answer Yes or No only."}
         ],
         instructions=DEVELOPER_MESSAGE,
+        # A Yes/No answer needs only a few tokens (16 is the API minimum)
+        max_output_tokens=16,
         # tools=TOOLS  # Commented out like original
     )
+
+async def evaluate_async(client, goal, collected_json):
+    """Evaluate if condensed results satisfy the research goal (quick Yes/No from the mini model)"""
+    review = await client.responses.create(**evaluate_request(goal, collected_json))
     return "yes" in review.output[0].content[0].text.lower()
 
+# --- Step 6b: Generate follow-up queries ---
+def more_searches_request(goal, collected_json, history):
+    """Build the follow-up queries request, replaying the planning conversation first"""
+    return dict(
+        model=MODEL,
+        input=history + [
+            {"role": "assistant", "content": f"Current data: {collected_json}"},
+            {"role": "user", "content": f"This has not met the goal: {goal}. Write 5 other web searches to achieve the goal"},
+        ],
+        instructions=DEVELOPER_MESSAGE,
+    )
+
+async def more_searches_async(client, goal, collected_json, history):
+    """Generate follow-up web search queries, returned as raw model text"""
+    more_searches = await client.responses.create(**more_searches_request(goal, collected_json, history))
+    return more_searches.output[0].content[0].text
+
+async def research_pipeline(client, goal, collected_json, history, queries_seen,
+                            evaluate_now=True, plan_next=True):
+    """Evaluate the goal while preparing the next iteration
+
+    Evaluation and follow-up query generation depend only on the collected
+    data, so they run concurrently. As soon as the follow-up queries are
+    known, their searches start speculatively and land in the shared search
+    cache, where the next iteration picks them up. Returns
+    (goal_satisfied, new_queries_text); when the goal is satisfied the
+    speculative work is cancelled and None returned. A failed follow-up
+    request is only raised when the goal is not satisfied. With
+    plan_next=False (no further iteration will run) only the evaluation runs.
+    """
+    async def plan_next_iteration():
+        try:
+            new_queries_text = await more_searches_async(client, goal, collected_json, history)
+        except Exception as e:
+            # Must not fail the evaluation; raised below only if it is needed
+            return None, e
+        try:
+            new_queries = orjson.loads(new_queries_text)
+        except orjson.JSONDecodeError:
+            return new_queries_text, None
+        if is_query_list(new_queries):
+            pending_queries = [q for q in dict.fromkeys(new_queries) if q not in queries_seen]
+            try:
+                await run_searches_async(client, pending_queries)
+            except Exception:
+                # Prefetching is best effort; the next iteration searches again
+                pass
+        return new_queries_text, None
+    
+    try:
+        async with asyncio.TaskGroup() as tg:
+            plan_task = tg.create_task(plan_next_iteration()) if plan_next else None
+            goal_satisfied = await evaluate_async(client, goal, collected_json) if evaluate_now else False
+            if goal_satisfied and plan_task is not None:
+                plan_task.cancel()
+    except ExceptionGroup as eg:
+        # Only the evaluation can fail the group; surface its original error
+        raise eg.exceptions[0]
+    if goal_satisfied or plan_task is None:
+        return goal_satisfied, None
+    new_queries_text, plan_error = plan_task.result()
+    if plan_error is not None:
+        raise plan_error
+    return False, new_queries_text
+
 # --- Step 7: Final synthesis ---
-def synthesize(client, goal, collected):
-    """Generate the final research report (matching original exactly)"""
-    report = client.responses.create(
+def synthesize_request(goal, collected):
+    """Build the final report request (matching original exactly)"""
+    return dict(
         model=MODEL,
         input=[
             {"role": "developer", "content": (f"Write a complete and detailed report about research goal: {goal}. "
                                             "Cite Sources inline using [n] and append a reference "
                                             "list mapping [n] to url")},
-            {"role": "assistant", "content": json.dumps(collected)},
+            {"role": "assistant", "content": orjson.dumps(collected).decode()},
         ],
         instructions=DEVELOPER_MESSAGE,
     )
-    return report.output[0].content[0].text
 
-# --- Main Streamlit UI ---
-def main():
-    """Main application function with clean UI"""
-    st.set_page_config(
-        page_title="Deep Research Clone",
-        page_icon="🔬",
-        layout="wide"
+def synthesize_stream(client, goal, collected):
+    """Stream the final research report text as it is generated
+
+    Raises RuntimeError if generation fails; warns if the report was cut short.
+    """
+    with client.responses.create(**synthesize_request(goal, collected), stream=True) as stream:
+        for event in stream:
+            if event.type == "response.output_text.delta":
+                yield event.delta
+            elif event.type == "response.failed":
+                error = event.response.error
+                raise RuntimeError(error.message if error else "report generation failed")
+            elif event.type == "error":
+                raise RuntimeError(event.message)
+            elif event.type == "response.incomplete":
+                details = event.response.incomplete_details
+                reason = details.reason if details else "unknown reason"
+                st.warning(f"⚠️ The report is incomplete ({reason}).")
+
+# --- Steps 6 + 7 in batch mode: Batch API jobs ---
+BATCH_POLL_INITIAL_DELAY = 5
+BATCH_POLL_MAX_DELAY = 60
+BATCH_RETRIEVE_ATTEMPTS = 3
+
+def retrieve_batch(client, batch_id):
+    """Retrieve a batch, retrying transient API errors with exponential backoff"""
+    for attempt in range(BATCH_RETRIEVE_ATTEMPTS):
+        try:
+            return client.batches.retrieve(batch_id)
+        except openai.APIError:
+            if attempt == BATCH_RETRIEVE_ATTEMPTS - 1:
+                raise
+            time.sleep(2 ** attempt)
+
+def batch_output_text(body):
+    """Extract the output text from a Responses API body returned by a batch"""
+    for item in body['output']:
+        if item.get('type') == 'message':
+            return item['content'][0]['text']
+    raise ValueError("Batch response contained no message output")
+
+def run_batch(client, requests, status):
+    """Submit requests (custom_id -> body) as one Batch API job and return their output texts"""
+    batch_input = b"\n".join(
+        orjson.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/responses", "body": body})
+        for custom_id, body in requests.items()
     )
+    batch_file = client.files.create(file=("research_batch.jsonl", batch_input), purpose="batch")
+    batch = client.batches.create(input_file_id=batch_file.id,
+                                  endpoint="/v1/responses",
+                                  completion_window="24h")
     
-    st.title("🔬 Deep Research Clone")
-    st.write("AI-powered research assistant with web search following the exact original flow.")
-    
-    # Get OpenAI client (this will show the API key input if needed)
-    client = get_openai_client()
-    
-    # Show success message once API key is set
-    if 'api_key' in st.session_state:
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            st.success("✅ API key configured successfully!")
-        with col2:
-            if st.button("🔄 Change API Key"):
-                del st.session_state['api_key']
-                st.rerun()
-        
-        # Add separator
-        st.markdown("---")
-        st.subheader("🎯 Start Your Research")
-    
-    # Step 1: Topic
-    topic = get_topic()
-    if not topic:
-        st.info("👆 Enter a research topic to begin.")
-        return
-    
-    # Step 2: Clarifying questions
-    if 'clarify_data' not in st.session_state or st.session_state.get('last_topic') != topic:
-        with st.spinner("🤔 Generating clarifying questions..."):
-            questions, clarify_id = get_clarifying_questions(client, topic)
-            st.session_state['clarify_data'] = (questions, clarify_id)
-            st.session_state['last_topic'] = topic
-    else:
-        questions, clarify_id = st.session_state['clarify_data']
-    
-    # Step 3: Answers
-    answers = get_answers(questions)
-    if not all(answer.strip() for answer in answers):
-        st.info("📝 Please answer all clarifying questions to continue.")
-        return
-    
-    # Step 4: Goal and queries
-    if 'goal_plan' not in st.session_state or st.session_state.get('last_answers') != answers:
-        with st.spinner("🎯 Generating research goal and queries..."):
-            plan, goal_queries_id = get_goal_and_queries(client, topic, questions, answers, clarify_id)
-            st.session_state['goal_plan'] = plan
-            st.session_state['goal_queries_id'] = goal_queries_id
-            st.session_state['last_answers'] = answers
-    else:
-        plan = st.session_state['goal_plan']
-        goal_queries_id = st.session_state['goal_queries_id']
+    # Poll with exponential backoff until the batch reaches a final state
+    try:
+        progress_bar = st.progress(0)
+        delay = BATCH_POLL_INITIAL_DELAY
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            status.update(label=f"📦 Batch job {batch.status}...")
+            counts = batch.request_counts
+            if counts and counts.total:
+                progress_bar.progress(counts.completed / counts.total)
+            time.sleep(delay)
+            delay = min(delay * 2, BATCH_POLL_MAX_DELAY)
+            batch = retrieve_batch(client, batch.id)
+        progress_bar.progress(1.0)
+    except BaseException:
+        # Abandoning the job (error, rerun or stop): don't leave it running and billing
+        try:
+            client.batches.cancel(batch.id)
+        except openai.OpenAIError:
+            pass
+        raise
     
-    goal = plan["goal"]
-    queries = plan["queries"]
+    if batch.status != "completed" or not batch.output_file_id:
+        raise RuntimeError(f"batch job {batch.status}")
     
-    # Display goal and queries
-    st.markdown("---")
-    st.subheader("🎯 Research Goal")
-    st.info(goal)
-    
-    st.subheader("🔍 Initial Search Queries")
-    for i, query in enumerate(queries, 1):
-        st.write(f"{i}. {query}")
+    outputs = {}
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        record = orjson.loads(line)
+        outputs[record['custom_id']] = batch_output_text(record['response']['body'])
+    return outputs
+
+def evaluate_and_synthesize_batch(client, goal, collected, collected_json, status):
+    """Evaluate the goal through the Batch API, then write the report the same way if it is met
+
+    The report is only requested once the evaluation says Yes, so no
+    report is paid for on iterations that need more research.
+    Returns (goal_satisfied, final_report or None).
+    """
+    outputs = run_batch(client, {'eval': evaluate_request(goal, collected_json)}, status)
+    if "yes" not in outputs['eval'].lower():
+        return False, None
+    status.update(label="📦 Goal satisfied, submitting report batch job...")
+    outputs = run_batch(client, {'synth': synthesize_request(goal, collected)}, status)
+    return True, outputs['synth']
+
+# --- Steps 5-7: Research loop ---
+def preview(text, n):
+    """Truncate text to n characters for display"""
+    return text[:n] + "..." if len(text) > n else text
+
+@st.fragment
+def research_loop(client, topic, goal, queries, history):
+    """Run the research loop; its widgets rerun only this fragment"""
+    # Opt-in batch mode: slower, but evaluation and synthesis cost 50% less
+    batch_mode = st.checkbox(
+        "📦 Batch mode",
+        key='batch_mode',
+        help="Run evaluation and report writing as OpenAI Batch API jobs "
+             "(the report only once the goal is met). "
+             "Cheaper, but each job may take much longer to complete."
+    )
     
     # Step 5: Research loop (matching original iterative approach)
     if st.button("🚀 Start Research", type="primary") or st.session_state.get('research_started'):
@@ -250,33 +470,44 @@ def main():
         
         # Initialize or get existing collected data
         collected = st.session_state.get('collected', [])
+        queries_seen = st.session_state.setdefault('queries_seen', set())
+        # Condensed results serialized once each, for evaluation and follow-up prompts
+        collected_json_items = st.session_state.setdefault('collected_json_items', [])
         current_queries = st.session_state.get('current_queries', queries)
         iteration_count = st.session_state.get('iteration_count', 0)
         
         # Safety limit for iterations
         max_iterations = 5
+        # Iterations to run before evaluating (the first searches rarely satisfy the goal)
+        min_iterations = 2
         
         if iteration_count < max_iterations:
             st.markdown("---")
             st.subheader(f"🔬 Research Iteration {iteration_count + 1}")
+            if st.session_state.pop('iteration_just_advanced', False):
+                st.info("🆕 New search queries generated. Continuing research...")
             
             # Run searches for current queries
             progress_bar = st.progress(0)
             
-            for i, q in enumerate(current_queries):
-                # Check if we already searched this query
-                if not any(item['query'] == q for item in collected):
-                    progress = (i + 1) / len(current_queries)
-                    progress_bar.progress(progress)
-                    
-                    with st.spinner(f"🔍 Searching: {q}"):
-                        result = run_search(client, q)
-                        collected.append(result)
-                        
-                        # Show search result preview
-                        with st.expander(f"📄 Results for: {q}", expanded=False):
-                            preview = result['research_output'][:300] + "..." if len(result['research_output']) > 300 else result['research_output']
-                            st.text_area("Search Output:", value=preview, height=100, disabled=True)
+            # Skip queries we already searched (and duplicates within this batch)
+            pending_queries = [q for q in dict.fromkeys(current_queries) if q not in queries_seen]
+            
+            if pending_queries:
+                with st.spinner(f"🔍 Running {len(pending_queries)} searches in parallel..."):
+                    results = run_with_async_client(run_searches_async, pending_queries, progress_bar)
+            else:
+                results = []
+            progress_bar.progress(1.0)
+            collected.extend(results)
+            queries_seen.update(pending_queries)
+            collected_json_items.extend(condensed_json(result) for result in results)
+            collected_json = join_json(collected_json_items)
+            
+            for result in results:
+                # Show search result preview
+                with st.expander(f"📄 Results for: {result['query']}", expanded=False):
+                    st.text_area("Search Output:", value=preview(result['research_output'], 300), height=100, disabled=True)
             
             # Update session state
             st.session_state['collected'] = collected
@@ -284,19 +515,46 @@ def main():
             
             # Step 6: Evaluate completeness
             st.subheader("🧐 Evaluating Research Completeness")
-            with st.spinner("📊 Checking if goal is satisfied..."):
-                goal_satisfied = evaluate(client, goal, collected)
+            final_report = None
+            new_queries_text = None
+            # Skip evaluation while it is too early for the goal to be met
+            evaluate_now = iteration_count + 1 >= min_iterations
+            # No follow-up queries are needed after the final allowed iteration
+            last_iteration = iteration_count + 1 >= max_iterations
+            if not evaluate_now:
+                st.info(f"⏭️ Skipping evaluation before iteration {min_iterations}.")
+            elif batch_mode:
+                with st.status("📦 Submitting batch job...") as status:
+                    try:
+                        goal_satisfied, final_report = evaluate_and_synthesize_batch(client, goal, collected, collected_json, status)
+                        status.update(label="✅ Batch job completed", state="complete")
+                    except (openai.OpenAIError, RuntimeError, ValueError, KeyError, TypeError) as e:
+                        # Streamlit's rerun/stop exceptions must propagate, so catch only job errors
+                        status.update(label=f"❌ Batch job failed: {str(e)}", state="error")
+                        batch_mode = False
+            if not evaluate_now or not batch_mode:
+                spinner_text = "📊 Checking if goal is satisfied..." if evaluate_now else "🔍 Generating new search queries..."
+                with st.spinner(spinner_text):
+                    goal_satisfied, new_queries_text = run_with_async_client(
+                        research_pipeline, goal, collected_json, history, queries_seen,
+                        evaluate_now, not last_iteration)
             
             if goal_satisfied:
                 st.success("✅ Research goal satisfied! Generating final report...")
                 
-                # Step 7: Final synthesis
-                with st.spinner("📝 Writing comprehensive research report..."):
-                    final_report = synthesize(client, goal, collected)
-                
                 st.markdown("---")
                 st.subheader("📋 === FINAL REPORT ===")
-                st.markdown(final_report)
+                
+                # Step 7: Final synthesis (already written in batch mode)
+                if final_report is None:
+                    try:
+                        final_report = st.write_stream(synthesize_stream(client, goal, collected))
+                    except RuntimeError as e:
+                        # Keep the collected research so the report can be retried
+                        st.error(f"❌ Report generation failed: {str(e)}")
+                        return
+                else:
+                    st.markdown(final_report)
                 
                 # Download button
                 st.download_button(
@@ -309,6 +567,8 @@ def main():
                 # Reset research state
                 st.session_state['research_started'] = False
                 st.session_state['collected'] = []
+                st.session_state['queries_seen'] = set()
+                st.session_state['collected_json_items'] = []
                 st.session_state['iteration_count'] = 0
                 
                 if st.button("🔄 Start New Research"):
@@ -317,32 +577,30 @@ def main():
                         del st.session_state[key]
                     st.rerun()
                     
+            elif last_iteration:
+                # Show the iteration-limit summary rather than planning an iteration that won't run
+                st.rerun()
             else:
                 st.warning("⚠️ More research needed. Generating additional queries...")
                 
-                # Generate additional queries (matching original exactly)
-                with st.spinner("🔍 Generating new search queries..."):
-                    more_searches = client.responses.create(
-                        model=MODEL,
-                        input=[
-                            {"role": "assistant", "content": f"Current data: {json.dumps(collected)}"},
-                            {"role": "user", "content": f"This has not met the goal: {goal}. Write 5 other web searches to achieve the goal"},
-                        ],
-                        instructions=DEVELOPER_MESSAGE,
-                        previous_response_id=goal_queries_id,
-                    )
-                    
-                    try:
-                        # Parse new queries (fixing the typo from original)
-                        new_queries_text = more_searches.output[0].content[0].text
-                        new_queries = json.loads(new_queries_text)
-                        if isinstance(new_queries, list):
-                            st.session_state['current_queries'] = new_queries
-                            st.info("🆕 New search queries generated. Click 'Start Research' again.")
-                        else:
-                            st.error("Could not parse additional queries.")
-                    except json.JSONDecodeError:
-                        st.error("Could not parse additional queries as JSON.")
+                # Generate additional queries (already generated alongside the evaluation)
+                if new_queries_text is None:
+                    with st.spinner("🔍 Generating new search queries..."):
+                        new_queries_text = run_with_async_client(
+                            more_searches_async, goal, collected_json, history)
+                
+                try:
+                    # Parse new queries (fixing the typo from original)
+                    new_queries = orjson.loads(new_queries_text)
+                    if is_query_list(new_queries):
+                        st.session_state['current_queries'] = new_queries
+                        # Start the next iteration right away (research_started keeps the loop going)
+                        st.session_state['iteration_just_advanced'] = True
+                        st.rerun()
+                    else:
+                        st.error("Could not parse additional queries.")
+                except orjson.JSONDecodeError:
+                    st.error("Could not parse additional queries as JSON.")
         else:
             st.warning("⚠️ Reached maximum iteration limit for safety.")
             
@@ -354,8 +612,75 @@ def main():
                 with st.expander("📄 View All Search Results", expanded=False):
                     for i, result in enumerate(collected, 1):
                         st.markdown(f"**{i}. {result['query']}**")
-                        st.text_area(f"Results {i}:", value=result['research_output'][:500] + "..." if len(result['research_output']) > 500 else result['research_output'], height=150, disabled=True)
+                        st.text_area(f"Results {i}:", value=preview(result['research_output'], 500), height=150, disabled=True)
                         st.markdown("---")
 
+# --- Main Streamlit UI ---
+def main():
+    """Main application function with clean UI"""
+    st.set_page_config(
+        page_title="Deep Research Clone",
+        page_icon="🔬",
+        layout="wide"
+    )
+    
+    st.title("🔬 Deep Research Clone")
+    st.write("AI-powered research assistant with web search following the exact original flow.")
+    
+    # Get OpenAI client (this will show the API key input if needed)
+    client = get_openai_client()
+    
+    # Show success message once API key is set
+    if 'api_key' in st.session_state:
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.success("✅ API key configured successfully!")
+        with col2:
+            if st.button("🔄 Change API Key"):
+                del st.session_state['api_key']
+                st.rerun()
+        
+        # Add separator
+        st.markdown("---")
+        st.subheader("🎯 Start Your Research")
+    
+    # Step 1: Topic
+    topic = get_topic()
+    if not topic:
+        st.info("👆 Enter a research topic to begin.")
+        return
+    
+    # Step 2: Clarifying questions (cached per topic)
+    with st.spinner("🤔 Generating clarifying questions..."):
+        questions, clarify_history = get_clarifying_questions(client, topic)
+    
+    # Step 3: Answers
+    answers = get_answers(questions)
+    if answers is None or not all(answer.strip() for answer in answers):
+        st.info("📝 Please answer all clarifying questions and submit to continue.")
+        return
+    
+    # Step 4: Goal and queries (cached per topic and answers)
+    with st.spinner("🎯 Generating research goal and queries..."):
+        plan, history = get_goal_and_queries(client, topic, questions, answers, clarify_history)
+    
+    goal = plan["goal"]
+    queries = plan["queries"]
+    if not is_query_list(queries):
+        st.error("Could not parse the research queries.")
+        return
+    
+    # Display goal and queries
+    st.markdown("---")
+    st.subheader("🎯 Research Goal")
+    st.info(goal)
+    
+    st.subheader("🔍 Initial Search Queries")
+    for i, query in enumerate(queries, 1):
+        st.write(f"{i}. {query}")
+    
+    # Steps 5-7: Research loop
+    research_loop(client, topic, goal, queries, history)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file